@@ -3,34 +3,105 @@
 Quick test script to identify working vs broken modules
 """
 
+import json
+import os
+import signal
 import subprocess
 import sys
 from pathlib import Path
 
-def test_module_build(module):
-    """Test if a module builds successfully"""
+# Seconds a single cargo command may run; cold esp-hal builds easily exceed 5 minutes
+# (overridden by the BUILD_TIMEOUT environment variable, see main())
+BUILD_TIMEOUT = 1800
+
+def run_cargo(cmd):
+    """Run a cargo command, killing its whole process group on timeout.
+    
+    subprocess.run only kills cargo itself, leaving rustc children running
+    and holding the target dir lock.
+    """
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        start_new_session=True
+    )
     try:
-        result = subprocess.run(
-            ["cargo", "build", "--release", "-p", module],
-            capture_output=True,
-            text=True,
-            timeout=120
-        )
-        return result.returncode == 0, result.stderr
+        stdout, stderr = proc.communicate(timeout=BUILD_TIMEOUT)
     except subprocess.TimeoutExpired:
-        return False, "Timeout"
+        os.killpg(proc.pid, signal.SIGTERM)
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        proc.communicate()
+        raise
+    return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
+def package_name(package_id):
+    """Package name from a cargo package ID such as path+file:///ws/drivers/mqtt-embassy#0.1.0"""
+    url, _, fragment = package_id.partition("#")
+    if "@" in fragment:
+        return fragment.split("@")[0]
+    return url.rstrip("/").rsplit("/", 1)[-1]
+
+def workspace_members():
+    """Names of all workspace members, or an empty list if cargo metadata fails"""
+    try:
+        result = run_cargo(["cargo", "metadata", "--no-deps", "--format-version=1"])
+    except Exception:
+        return []
+    if result.returncode != 0:
+        return []
+    metadata = json.loads(result.stdout)
+    members = set(metadata["workspace_members"])
+    return [package["name"] for package in metadata["packages"] if package["id"] in members]
+
+def check_workspace():
+    """Check every workspace module in one cargo run.
+    
+    Returns the set of packages that compiled and a dict mapping broken
+    packages to their first error. --keep-going makes cargo check every
+    crate it can reach instead of stopping at the first broken one.
+    """
+    compiled = set()
+    errors = {}
+    try:
+        result = run_cargo(["cargo", "check", "--workspace", "--keep-going", "--message-format=json"])
+    except subprocess.TimeoutExpired:
+        return compiled, {"workspace": "Timeout"}
     except Exception as e:
-        return False, str(e)
+        return compiled, {"workspace": str(e)}
+    
+    for line in result.stdout.splitlines():
+        if not line.startswith("{"):
+            continue
+        record = json.loads(line)
+        if not record.get("package_id", "").startswith("path+"):
+            continue  # Only workspace modules, not registry dependencies
+        name = package_name(record["package_id"])
+        if record["reason"] == "compiler-artifact":
+            # A build script artifact does not mean the crate itself compiled:
+            # build scripts are checked even when a normal dependency is broken
+            if {"lib", "bin"}.intersection(record["target"]["kind"]):
+                compiled.add(name)
+        elif record["reason"] == "compiler-message" and record["message"]["level"] == "error":
+            errors.setdefault(name, record["message"]["rendered"] or record["message"]["message"])
+    
+    if result.returncode != 0 and not errors:
+        errors["workspace"] = result.stderr
+    return compiled - set(errors), errors
 
-def test_binary_build(binary):
-    """Test if a binary builds successfully"""
+def test_binary_build(binary, deployable=False):
+    """Test if a binary compiles; only the deployable one gets a full release build"""
+    command = ["cargo", "build", "--release"] if deployable else ["cargo", "check"]
     try:
-        result = subprocess.run(
-            ["cargo", "build", "--release", "--bin", binary],
-            capture_output=True,
-            text=True,
-            timeout=120
-        )
+        result = run_cargo(command + ["--bin", binary])
         return result.returncode == 0, result.stderr
     except subprocess.TimeoutExpired:
         return False, "Timeout"
@@ -38,36 +109,39 @@ def test_binary_build(binary):
         return False, str(e)
 
 def main():
+    global BUILD_TIMEOUT
+    build_timeout = os.environ.get("BUILD_TIMEOUT", str(BUILD_TIMEOUT))
+    try:
+        BUILD_TIMEOUT = int(build_timeout)
+        if BUILD_TIMEOUT <= 0:
+            raise ValueError
+    except ValueError:
+        print(f"❌ Error: BUILD_TIMEOUT must be a positive number of seconds, got {build_timeout!r}")
+        sys.exit(1)
+    
     print("🔍 Quick Module Build Test")
     print("=" * 50)
     
-    # Test modules
-    modules = [
-        "blinky",
-        "bme280-embassy", 
-        "wifi-embassy",
-        "wifi-synchronous",
-        "serial-console-embassy",
-        "mqtt-embassy",
-        "main-app",
-        "iot-common",
-        "iot-container",
-        "iot-hal",
-        "iot-performance"
-    ]
-    
     working = []
     broken = []
     
+    print("Checking workspace...")
+    compiled, errors = check_workspace()
+    # Every member is reported, whether it compiled, failed or was never reached
+    modules = workspace_members() or sorted(compiled | set(errors) - {"workspace"})
     for module in modules:
         print(f"Testing {module}...", end=" ")
-        success, error = test_module_build(module)
-        if success:
+        if module in compiled:
             print("✅ WORKS")
             working.append(module)
         else:
             print("❌ BROKEN")
+            # Members never reached depend on a broken crate
+            error = errors.pop(module, "Not checked (a dependency failed)")
             broken.append((module, error[:100] if error else "Unknown error"))
+    for item, error in errors.items():
+        if item not in modules:
+            broken.append((item, error[:100] if error else "Unknown error"))
     
     # Test specific binaries
     print(f"\n🎯 Testing Binary Targets")
@@ -76,7 +150,7 @@ def main():
     binaries = ["main", "main_container"]
     for binary in binaries:
         print(f"Testing {binary}...", end=" ")
-        success, error = test_binary_build(binary)
+        success, error = test_binary_build(binary, deployable=(binary == "main"))
         if success:
             print("✅ WORKS")
             working.append(f"{binary} (binary)")